@@ -0,0 +1,241 @@
+"""Measure how the main stages of the closed pipe network workflow in the
+notebooks scale with the size of the network.
+
+Usage:
+    python benchmark.py [--sizes 10 1000 10000 100000] [--topologies ladder tree]
+                        [--memory] [--output results.csv]
+
+For each size and topology a network with (about) that number of conduits is
+generated with `network_generator`, and the stages `load_from_csv`,
+`get_flow_path_table`, `balance_network_at_design`, `save_network`,
+`load_network` and `analyze` are timed. With `--memory` the peak memory
+allocated during each stage is also recorded (with `tracemalloc`, which slows
+down the stages considerably, so timings and memory are best compared between
+runs with the same setting). With `--output` the results of each network are
+appended to a CSV file as soon as it is done, so that results can be tracked
+between versions of the `hvac` package.
+
+The terminal flow rates are scaled down with the size of the network, so that
+no header pipe carries more than `MAX_HEADER_FLOW` and all pipes can be sized
+with the largest pipe in the steel schedule (DN100). The large networks are
+therefore not realistic designs, but they do have the topology and the number
+of unknowns of one. If a stage fails, the error is recorded and the remaining
+stages of that network are skipped.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from deps import load_packages
+import network_generator
+
+load_packages()
+
+from hvac import Quantity  # noqa: E402
+from hvac.fluid_flow import PipeNetwork, PipeScheduleFactory, PseudoConduit, load_network  # noqa: E402
+from hvac.fluid_flow.network import save_network  # noqa: E402
+from hvac.fluids import Fluid  # noqa: E402
+
+Q_ = Quantity
+
+# largest flow rate (L/s) in a header pipe: DN100 steel pipe at 0.2 kPa/m
+MAX_HEADER_FLOW = 10.0
+TERMINAL_FLOW = (0.05, 0.2)
+
+
+class StageFailed(Exception):
+    pass
+
+
+class StageRecorder:
+
+    def __init__(self, topology: str, n_conduits: int, memory: bool = False):
+        self.topology = topology
+        self.n_conduits = n_conduits
+        self.memory = memory
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the stage `name`. If the stage raises an exception, it is
+        recorded and `StageFailed` is raised to skip the remaining stages.
+        """
+        if self.memory:
+            tracemalloc.start()
+        error = None
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as err:
+            error = f'{type(err).__name__}: {err}'
+        dt = time.perf_counter() - t0
+        peak = None
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        self.records.append({
+            'topology': self.topology,
+            'n_conduits': self.n_conduits,
+            'stage': name,
+            'time [s]': dt,
+            'peak memory [MiB]': peak,
+            'error': error
+        })
+        print(
+            f"{self.topology:<6s} {self.n_conduits:>8d} conduits | {name:<25s} | "
+            f"{dt:10.3f} s" + (f" | FAILED: {error}" if error else "")
+        )
+        if error:
+            raise StageFailed(error)
+
+
+def _create_schedules():
+    PipeScheduleFactory.get(
+        name='steel',
+        file_path='./pipe-schedule-data/steel_pipe_sch40.ods',
+        unit='mm'
+    )
+    PipeScheduleFactory.get(
+        name='pex',
+        file_path='./pipe-schedule-data/henco_standard_pex.ods',
+    )
+
+
+def _scaled_terminal_flow(n_terminals: int, n_headers: int) -> tuple:
+    # range of terminal flow rates for which the mean flow rate through each
+    # of the `n_headers` pipes leaving the start node stays below
+    # MAX_HEADER_FLOW (the upper bound of the range is 1.6 x the mean)
+    q_mean = sum(TERMINAL_FLOW) / 2
+    f = min(1.0, MAX_HEADER_FLOW * n_headers / (1.6 * n_terminals * q_mean))
+    return TERMINAL_FLOW[0] * f, TERMINAL_FLOW[1] * f
+
+
+def _tree_shape(n_conduits: int) -> tuple:
+    # depth and branching of the tree network with the number of conduits
+    # closest to `n_conduits`
+    best = None
+    for branching in range(2, 9):
+        depth = 1
+        while True:
+            n_nodes = sum(branching ** k for k in range(1, depth + 1))
+            n = 2 * n_nodes + branching ** depth
+            if best is None or abs(n - n_conduits) < abs(best[0] - n_conduits):
+                best = (n, depth, branching)
+            if n > n_conduits:
+                break
+            depth += 1
+    return best[1], best[2]
+
+
+def generate(topology: str, n_conduits: int):
+    if topology == 'ladder':
+        n_cross_overs = max(1, n_conduits // 3)
+        return network_generator.ladder_network(
+            n_cross_overs,
+            header_schedule='steel',
+            cross_over_schedule='pex',
+            terminal_flow=_scaled_terminal_flow(n_cross_overs, 1),
+            seed=n_cross_overs
+        )
+    if topology == 'tree':
+        depth, branching = _tree_shape(n_conduits)
+        return network_generator.tree_network(
+            depth, branching,
+            header_schedule='steel',
+            terminal_schedule='pex',
+            terminal_flow=_scaled_terminal_flow(branching ** depth, branching),
+            seed=n_conduits
+        )
+    raise ValueError(f"unknown topology '{topology}'")
+
+
+def run(topology: str, n_conduits: int, work_dir: str, memory: bool = False) -> list:
+    table = generate(topology, n_conduits)
+    recorder = StageRecorder(topology, len(table), memory)
+    cross_over_IDs = network_generator.get_cross_over_IDs(table)
+    csv_path = os.path.join(work_dir, f'{topology}_{len(table)}.csv')
+    pickle_path = os.path.join(work_dir, f'{topology}_{len(table)}.pickle')
+    table.to_csv(csv_path, index=False)
+
+    water = Fluid('Water')
+    pipe_network = PipeNetwork.create(
+        ID=f'{topology}_{len(table)}',
+        fluid=water(T=Q_(50, 'degC'), P=Q_(2, 'bar')),
+        wall_roughness=Q_(0.0015, 'mm'),
+        schedule=None,
+        start_node_ID='S0',
+        end_node_ID='R0'
+    )
+    pipe_network.units['volume_flow_rate'] = 'L / s'
+    pipe_network.units['pressure'] = 'kPa'
+    pipe_network.units['specific_pressure'] = 'kPa / m'
+
+    try:
+        with recorder.stage('load_from_csv'):
+            pipe_network.load_from_csv(csv_path)
+        with recorder.stage('get_flow_path_table'):
+            pipe_network.get_flow_path_table()
+        with recorder.stage('add_balancing_valves'):
+            for cross_over_ID in cross_over_IDs:
+                Kvs = pipe_network.add_balancing_valve(
+                    cross_over_ID=cross_over_ID,
+                    pressure_drop_full_open=Q_(3, 'kPa')
+                )
+                pipe_network.set_balancing_valve_Kvs(cross_over_ID, Kvs)
+        with recorder.stage('balance_network_at_design'):
+            pipe_network.balance_network_at_design()
+        with recorder.stage('save_network'):
+            save_network(pipe_network, pickle_path)
+        with recorder.stage('load_network'):
+            pipe_network = load_network(pickle_path)
+        with recorder.stage('add_pump'):
+            # close the network with a pump that delivers the design pressure
+            # difference, like in the analysis notebook
+            dp_pump = pipe_network.hydraulic_resistance * pipe_network.volume_flow_rate ** 2
+            pipe_network.add_conduit(
+                conduit=PseudoConduit.create(fixed_pressure_drop=-dp_pump.to('kPa')),
+                conduit_ID=f'P{len(table) + 1}',
+                start_node_ID='R0',
+                end_node_ID='S0',
+                loop_ID='L1'
+            )
+        with recorder.stage('analyze'):
+            pipe_network.analyze(tolerance=Q_(1, 'Pa'), i_max=500)
+    except StageFailed:
+        pass
+    return recorder.records
+
+
+def _write(records: list, output: str = None) -> None:
+    results = pd.DataFrame(records)
+    results.insert(0, 'timestamp', datetime.now().isoformat(timespec='seconds'))
+    if output:
+        results.to_csv(
+            output, mode='a', index=False,
+            header=not os.path.exists(output)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--topologies', nargs='+', default=['ladder', 'tree'], choices=['ladder', 'tree'])
+    parser.add_argument('--memory', action='store_true', help='record peak memory of each stage')
+    parser.add_argument('--output', help='CSV file to which the results are appended')
+    args = parser.parse_args()
+
+    _create_schedules()
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_conduits in args.sizes:
+            for topology in args.topologies:
+                _write(run(topology, n_conduits, work_dir, args.memory), args.output)
+
+
+if __name__ == '__main__':
+    main()
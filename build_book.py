@@ -0,0 +1,231 @@
+"""Build the book with cached notebook execution.
+
+Usage:
+    python build_book.py [--force]
+
+The book is configured with `execute_notebooks: cache` (see `_config.yml`), so
+jupyter-book only re-executes a notebook when its code has changed. However,
+the notebooks also depend on files they read (`networks/*.csv`,
+`pipe-schedule-data/*.ods`, ...), on the local modules they import
+(`jupyter_addons`, `deps.py`, see `LOCAL_FILES`) and on the `hvac` package,
+which jupyter-cache doesn't look at. Before building, this script computes for
+each notebook a fingerprint of its code cells, the files it refers to, the local
+modules and the `hvac` source, and removes the cached outputs of the notebooks
+whose fingerprint changed since the previous build. Sphinx only reads the
+sources that have changed, so in that case the book is built with `--all`: the
+notebooks with a cache record reuse their outputs, the others are executed.
+
+Some notebooks read a file that is written by another notebook (the network
+pickle written by the design notebook and read by the analysis notebook, see
+`OUTPUT_FILES`). jupyter-book executes the notebooks in alphabetical order, so
+a reading notebook may be executed before the notebook that rewrites the file.
+Therefore, if such a file has changed during the build, the cached outputs of
+the notebooks that read it are removed and the book is built a second time.
+
+With `--force` the execution cache is cleared and all notebooks are re-executed.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import nbformat
+from jupyter_cache import get_cache
+
+from deps import get_hvac_fingerprint
+
+BOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BOOK_DIR, '_build', '.jupyter_cache')
+FINGERPRINT_FILE = os.path.join(BOOK_DIR, '_build', 'input_fingerprints.json')
+NOTEBOOKS = [
+    'single_duct.ipynb',
+    'closed_pipe_network_design.ipynb',
+    'closed_pipe_network_analysis.ipynb'
+]
+
+# files written by a notebook: they are input files of the other notebooks that
+# refer to them, but not of the notebook that writes them
+OUTPUT_FILES = {
+    'closed_pipe_network_design.ipynb': ['networks/hydronic_network.pickle']
+}
+
+# local modules and files used by every notebook
+LOCAL_FILES = ['deps.py', 'my_styles.css', 'jupyter_addons/*.py']
+
+_path_pattern = re.compile(r"""['"](\.?/?[\w\-./]+\.\w+)['"]""")
+
+
+def _code_source(nb) -> str:
+    return '\n'.join(cell.source for cell in nb.cells if cell.cell_type == 'code')
+
+
+def get_input_files(name: str, nb) -> list:
+    """Return the paths (relative to the book directory) of the existing files
+    that are referred to by a string literal in the code cells of notebook `nb`
+    with file name `name`, except for the files written by the notebook itself.
+    """
+    outputs = {os.path.normpath(path) for path in OUTPUT_FILES.get(name, [])}
+    paths = set()
+    for match in _path_pattern.findall(_code_source(nb)):
+        path = os.path.normpath(match)
+        if path not in outputs and os.path.isfile(os.path.join(BOOK_DIR, path)):
+            paths.add(path)
+    return sorted(paths)
+
+
+def _hash_file(path: str, h) -> None:
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+
+
+def hash_output_files() -> dict:
+    """Return the hashes of the files in `OUTPUT_FILES` (None if a file doesn't
+    exist).
+    """
+    hashes = {}
+    for paths in OUTPUT_FILES.values():
+        for path in paths:
+            path = os.path.normpath(path)
+            try:
+                h = hashlib.sha256()
+                _hash_file(os.path.join(BOOK_DIR, path), h)
+                hashes[path] = h.hexdigest()
+            except FileNotFoundError:
+                hashes[path] = None
+    return hashes
+
+
+def get_local_files() -> list:
+    """Return the paths (relative to the book directory) of the existing files
+    in `LOCAL_FILES`.
+    """
+    paths = set()
+    for pattern in LOCAL_FILES:
+        for path in glob.glob(os.path.join(BOOK_DIR, pattern)):
+            paths.add(os.path.relpath(path, BOOK_DIR))
+    return sorted(paths)
+
+
+def get_fingerprint(nb, input_files: list, hvac_fingerprint: str) -> str:
+    h = hashlib.sha256()
+    h.update(_code_source(nb).encode())
+    for path in input_files + get_local_files():
+        h.update(path.encode())
+        _hash_file(os.path.join(BOOK_DIR, path), h)
+    h.update(hvac_fingerprint.encode())
+    return h.hexdigest()
+
+
+def compute_fingerprints() -> tuple:
+    """Read the notebooks and return a dict with the notebooks, a dict with
+    their input files and a dict with their current fingerprints, each keyed by
+    notebook name.
+    """
+    hvac_fingerprint = get_hvac_fingerprint()
+    notebooks, input_files, fingerprints = {}, {}, {}
+    for name in NOTEBOOKS:
+        nb = nbformat.read(os.path.join(BOOK_DIR, name), as_version=4)
+        notebooks[name] = nb
+        input_files[name] = get_input_files(name, nb)
+        fingerprints[name] = get_fingerprint(nb, input_files[name], hvac_fingerprint)
+    return notebooks, input_files, fingerprints
+
+
+def invalidate_cache() -> list:
+    """Remove the cached outputs of the notebooks whose inputs have changed
+    since the previous build and return the names of these notebooks.
+    """
+    try:
+        with open(FINGERPRINT_FILE) as f:
+            old_fingerprints = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        old_fingerprints = {}
+    notebooks, input_files, fingerprints = compute_fingerprints()
+    stale = [name for name in NOTEBOOKS if old_fingerprints.get(name) != fingerprints[name]]
+    remove_cache_records(notebooks, stale)
+    return stale
+
+
+def remove_cache_records(notebooks: dict, names: list) -> None:
+    """Remove the cached outputs of the notebooks `names` from the execution
+    cache, so that they are executed in the next build.
+    """
+    if not os.path.isdir(CACHE_DIR):
+        return
+    cache = get_cache(CACHE_DIR)
+    for name in names:
+        try:
+            record = cache.match_cache_notebook(notebooks[name])
+        except KeyError:
+            continue
+        cache.remove_cache_record(record.pk)
+
+
+def get_readers(changed_files: list) -> list:
+    """Return the names of the notebooks that have one of `changed_files` as
+    input file.
+    """
+    input_files = compute_fingerprints()[1]
+    changed_files = set(changed_files)
+    return [name for name in NOTEBOOKS if changed_files.intersection(input_files[name])]
+
+
+def build(all_pages: bool) -> int:
+    """Run `jupyter-book build` and return its exit code. With `all_pages`,
+    all pages are read again (and the notebooks without cached outputs are
+    executed), not only the pages whose source has changed.
+    """
+    command = ['jupyter-book', 'build', BOOK_DIR]
+    if all_pages:
+        command.append('--all')
+    return subprocess.run(command).returncode
+
+
+def save_fingerprints() -> None:
+    """Store the fingerprints of the notebooks after a build, in which every
+    notebook was executed with (or its cached outputs match) the current
+    contents of its input files.
+    """
+    fingerprints = compute_fingerprints()[2]
+    os.makedirs(os.path.dirname(FINGERPRINT_FILE), exist_ok=True)
+    with open(FINGERPRINT_FILE, 'w') as f:
+        json.dump(fingerprints, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='re-execute all notebooks')
+    args = parser.parse_args()
+    if args.force:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        stale = NOTEBOOKS
+    else:
+        stale = invalidate_cache()
+    print('notebooks to execute:', ', '.join(stale) if stale else 'none')
+    output_hashes = hash_output_files()
+    returncode = build(all_pages=bool(stale))
+    if returncode == 0:
+        changed_files = [
+            path for path, h in hash_output_files().items()
+            if h != output_hashes[path]
+        ]
+        readers = get_readers(changed_files)
+        if readers:
+            # these notebooks may have read the file before it was rewritten
+            print('input files changed during the build:', ', '.join(changed_files))
+            print('notebooks to execute again:', ', '.join(readers))
+            remove_cache_records(compute_fingerprints()[0], readers)
+            returncode = build(all_pages=True)
+    if returncode == 0:
+        save_fingerprints()
+    sys.exit(returncode)
+
+
+if __name__ == '__main__':
+    main()
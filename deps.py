@@ -1,3 +1,6 @@
+import hashlib
+import importlib.util
+import os
 import sys
 
 
@@ -5,3 +8,24 @@ def load_packages():
     sys.path.extend([
         "C:/Users/Tom/PycharmProjects/ProjectHVAC"
     ])
+
+
+def get_hvac_fingerprint() -> str:
+    """Return a hash of the source files of the `hvac` package, without
+    importing it.
+    """
+    load_packages()
+    spec = importlib.util.find_spec('hvac')
+    if spec is None or not spec.submodule_search_locations:
+        return ''
+    h = hashlib.sha256()
+    for location in spec.submodule_search_locations:
+        for root, dirs, files in os.walk(location):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith('.py'):
+                    path = os.path.join(root, file)
+                    h.update(os.path.relpath(path, location).encode())
+                    with open(path, 'rb') as f:
+                        h.update(f.read())
+    return h.hexdigest()
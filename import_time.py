@@ -0,0 +1,83 @@
+"""Measure the time needed to import the `hvac` entry points used by the
+notebooks, each in a fresh Python interpreter.
+
+Usage:
+    python import_time.py [--repeat 3] [--limit 1.0]
+
+For each import statement the best wall time of `--repeat` runs is reported,
+together with the heavy third-party packages that were loaded as a side effect
+of the import. The script exits with status 1 if any import fails or takes
+longer than `--limit` seconds, so it can be used to guard the startup time of
+batch jobs.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Optional
+
+from deps import load_packages
+
+IMPORTS = [
+    "from hvac import Quantity",
+    "from hvac.fluids import Fluid",
+    "from hvac.fluid_flow import PipeNetwork, PipeScheduleFactory",
+    "from hvac.fluid_flow import load_network, PseudoConduit, SystemCurve",
+    "from hvac.fluid_flow import Duct, Rectangular, Circular",
+    "from hvac.fluid_flow.fittings import pipe",
+    "from hvac.fluid_flow.fittings.duct import ElbowA7D",
+]
+
+HEAVY_MODULES = ['pint', 'CoolProp', 'pandas', 'scipy', 'matplotlib']
+
+_probe = """
+import sys, time, json
+sys.path.extend({paths!r})
+t0 = time.perf_counter()
+{statement}
+dt = time.perf_counter() - t0
+print(json.dumps({{'time': dt, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement: str, repeat: int = 3) -> Optional[dict]:
+    """Import `statement` in `repeat` fresh interpreters and return the best
+    time and the heavy modules that were loaded. If the import fails, the
+    statement and the error output of the interpreter are printed and None is
+    returned.
+    """
+    paths = list(sys.path)
+    code = _probe.format(paths=paths, statement=statement, heavy=HEAVY_MODULES)
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"import failed: {statement}\n{proc.stderr}", file=sys.stderr)
+            return None
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result['time'] < best['time']:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=float, default=1.0, help='maximum import time in seconds')
+    args = parser.parse_args()
+
+    load_packages()
+    failed = False
+    for statement in IMPORTS:
+        result = measure(statement, args.repeat)
+        if result is None:
+            failed = True
+            print(f"{'failed':>10s} | {statement}")
+            continue
+        failed = failed or result['time'] > args.limit
+        print(f"{result['time']:8.3f} s | {statement:<70s} | {', '.join(result['loaded'])}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
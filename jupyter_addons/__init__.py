@@ -1,9 +1,21 @@
+import math
+from functools import lru_cache
+from typing import Optional, Union, TextIO
 from IPython.core.display import display, HTML
 import pandas as pd
+from .valve_explorer import ValveExplorer
 
+__all__ = ['set_css', 'display_item', 'display_list', 'display_table', 'write_table', 'ValveExplorer']
 
-def set_css():
-    return HTML('<style>{}</style><p>Loaded <code>my_styles.css</code></p>'.format(open('my_styles.css').read()))
+
+@lru_cache(maxsize=None)
+def _read_css(file_path: str) -> str:
+    with open(file_path) as f:
+        return f.read()
+
+
+def set_css(file_path: str = 'my_styles.css'):
+    return HTML('<style>{}</style><p>Loaded <code>{}</code></p>'.format(_read_css(file_path), file_path))
 
 
 # noinspection PyTypeChecker
@@ -24,16 +36,79 @@ def display_list(items):
     - items : List[str]
         A list of items (strings with HTML markup) to be displayed
     """
-    html_str = "<ul>"
-    for item in items:
-        html_str += f"<li>{item}</li>"
-    html_str += "</ul>"
+    html_str = "".join(["<ul>", *(f"<li>{item}</li>" for item in items), "</ul>"])
     # noinspection PyTypeChecker
     display(HTML(html_str))
 
 
-def display_table(df):
-    """Display a Pandas DataFrame or Series in a HTML table."""
+def _table_html(df, max_rows: int = 60, page: Optional[int] = None, page_size: int = 50) -> str:
     if isinstance(df, pd.Series): df = df.to_frame(df.name)
+    if page is not None:
+        n_rows = len(df)
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, not {page_size}")
+        n_pages = max(1, math.ceil(n_rows / page_size))
+        if not 0 <= page < n_pages:
+            raise ValueError(f"page must be between 0 and {n_pages - 1}, not {page}")
+        start = page * page_size
+        end = min(start + page_size, n_rows)
+        return "".join([
+            '<div class="my_table">', df.iloc[start:end].to_html(), '</div>',
+            f'<p>rows {start} to {end - 1} of {n_rows}</p>' if n_rows else '<p>0 rows</p>'
+        ])
+    truncated = len(df) > max_rows
+    return "".join([
+        '<div class="my_table">',
+        df.to_html(max_rows=max_rows if truncated else None, show_dimensions=truncated),
+        '</div>'
+    ])
+
+
+def display_table(df, max_rows: int = 60, page: Optional[int] = None, page_size: int = 50):
+    """Display a Pandas DataFrame or Series in a HTML table.
+
+    Params:
+    - df : DataFrame | Series
+        The table to be displayed.
+    - max_rows : int, default 60
+        If the table has more rows, only the first and last `max_rows // 2`
+        rows are rendered, together with the number of rows and columns.
+    - page : int, optional
+        Display only page number `page` (zero-based) of the table, each page
+        having `page_size` rows. Raises a `ValueError` if the table has no
+        such page.
+    - page_size : int, default 50
+        The number of rows on a page.
+    """
     # noinspection PyTypeChecker
-    display(HTML(f'<div class="my_table">{df.to_html()}</div>'))
+    display(HTML(_table_html(df, max_rows, page, page_size)))
+
+
+def write_table(df, file: Union[str, TextIO], chunk_size: int = 1000):
+    """Write a Pandas DataFrame or Series as a HTML table to a file, without
+    holding the HTML of the complete table in memory. Use this for very large
+    tables that shouldn't be displayed (and saved) in the notebook itself.
+
+    Params:
+    - df : DataFrame | Series
+        The table to be written.
+    - file : str | TextIO
+        The path of the HTML file or an opened text stream.
+    - chunk_size : int, default 1000
+        The number of rows that are rendered at a time.
+    """
+    if isinstance(df, pd.Series): df = df.to_frame(df.name)
+    if isinstance(file, str):
+        with open(file, 'w') as f:
+            write_table(df, f, chunk_size)
+        return
+    # the header and table tags are taken from the empty table, the rows of
+    # each chunk from the table body of the chunk
+    head = df.iloc[:0].to_html()
+    file.write('<div class="my_table">')
+    file.write(head[:head.index('<tbody>') + len('<tbody>')])
+    for start in range(0, len(df), chunk_size):
+        body = df.iloc[start:start + chunk_size].to_html(header=False)
+        file.write(body[body.index('<tbody>') + len('<tbody>'):body.rindex('</tbody>')])
+    file.write(head[head.rindex('</tbody>'):])
+    file.write('</div>')
@@ -0,0 +1,171 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Callable
+
+
+class ValveExplorer:
+    """Widget with a slider for the opening of each control valve in a pipe
+    network. When a slider is moved, the network is analyzed again in a
+    background thread and the pipe table and the chart with the system curves
+    are updated, so the notebook stays responsive while the network is being
+    solved. The chart shows the system curve at the initial valve openings
+    together with the system curve at the current openings.
+
+    Rapid slider moves are debounced: a new analysis is only started when the
+    sliders have been left alone for `debounce` seconds. An analysis that has
+    been superseded by newer slider settings before it started is skipped; an
+    analysis that is already running can't be interrupted, but its results are
+    discarded.
+
+    Params:
+    - pipe_network : PipeNetwork
+        The pipe network with control valves in its cross-overs.
+    - cross_over_IDs : List[str]
+        The IDs of the cross-overs with a control valve.
+    - tolerance : Quantity
+        Passed to `pipe_network.analyze`.
+    - i_max : int, default 500
+        Passed to `pipe_network.analyze`.
+    - percent_open : Dict[str, float], optional
+        Initial opening of the valves. Valves not in the dict start fully open.
+    - table : Callable, optional
+        Function that takes the pipe network and returns the table to be
+        displayed. By default `pipe_network.get_pipe_table()`.
+    - debounce : float, default 0.3
+        Time (in seconds) to wait after the last slider move before the network
+        is analyzed.
+    - max_rows : int, default 60
+        See `display_table`.
+    - chart_settings : dict, optional
+        Keyword arguments passed to `plot_curves` to draw the system curves,
+        e.g. `V_step`, `V_max`, `dP_step` and `dP_max`. By default the chart
+        has size (8, 6) and shows flow rates in L/s and pressures in kPa.
+
+    Usage:
+        explorer = ValveExplorer(pipe_network, ['P5', 'P6', 'P7', 'P8'], Q_(1, 'Pa'))
+        explorer.show()
+    """
+
+    def __init__(
+            self,
+            pipe_network,
+            cross_over_IDs: List[str],
+            tolerance,
+            i_max: int = 500,
+            percent_open: Optional[Dict[str, float]] = None,
+            table: Optional[Callable] = None,
+            debounce: float = 0.3,
+            max_rows: int = 60,
+            chart_settings: Optional[dict] = None
+    ):
+        import ipywidgets as widgets
+
+        self.pipe_network = pipe_network
+        self.tolerance = tolerance
+        self.i_max = i_max
+        self.table = table or (lambda network: network.get_pipe_table())
+        self.debounce = debounce
+        self.max_rows = max_rows
+        self.chart_settings = {'fig_size': (8, 6), 'V_unit': 'L / s', 'dP_unit': 'kPa', **(chart_settings or {})}
+        percent_open = percent_open or {}
+        self.sliders = {
+            ID: widgets.FloatSlider(
+                value=percent_open.get(ID, 100.0), min=0.0, max=100.0, step=1.0,
+                description=ID, continuous_update=True
+            )
+            for ID in cross_over_IDs
+        }
+        for slider in self.sliders.values():
+            slider.observe(self._on_change, names='value')
+        self.status = widgets.Label()
+        self.resistance = widgets.HTML()
+        self.output = widgets.HTML()
+        self.chart = widgets.Output()
+        self.widget = widgets.VBox([
+            widgets.HBox(list(self.sliders.values())),
+            self.status, self.resistance, self.chart, self.output
+        ])
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._timer = None
+        self._generation = 0
+        self._table = None
+        self._initial_curve = None
+        self._submit()
+
+    def show(self):
+        """Display the widget in the notebook."""
+        from IPython.core.display import display
+        display(self.widget)
+
+    def _on_change(self, _):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._submit)
+            self._timer.start()
+
+    def _submit(self):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        openings = {ID: slider.value for ID, slider in self.sliders.items()}
+        self._executor.submit(self._solve, generation, openings)
+
+    def _is_superseded(self, generation: int) -> bool:
+        with self._lock:
+            return generation != self._generation
+
+    def _draw_curves(self):
+        from IPython.display import clear_output
+        from hvac.fluid_flow import SystemCurve
+        from hvac.fluid_flow.utils import plot_curves
+
+        resistance = self.pipe_network.hydraulic_resistance
+        if self._initial_curve is None:
+            self._initial_curve = SystemCurve.create(resistance, name='initial openings')
+            system_curves = [self._initial_curve]
+        else:
+            system_curves = [self._initial_curve, SystemCurve.create(resistance, name='current openings')]
+        chart = plot_curves(pump_curves=[], system_curves=system_curves, working_point=None, **self.chart_settings)
+        with self.chart:
+            clear_output(wait=True)
+            chart.show()
+
+    def _solve(self, generation: int, openings: Dict[str, float]):
+        # solves run one at a time in the single worker thread
+        if self._is_superseded(generation):
+            return
+        self.status.value = 'solving...'
+        try:
+            for ID, percent_open in openings.items():
+                self.pipe_network.set_control_valve_opening(ID, percent_open=percent_open)
+            i = self.pipe_network.analyze(tolerance=self.tolerance, i_max=self.i_max)
+            table = self.table(self.pipe_network)
+            if self._is_superseded(generation):
+                return
+            resistance = (
+                "network hydraulic resistance: "
+                f"<b>{self.pipe_network.hydraulic_resistance.to('Pa / (m ** 3 / s) ** 2'):~P.5g}</b>"
+            )
+            # only re-render the table if the results have changed
+            if self._table is None or not table.equals(self._table):
+                from . import _table_html
+                self.output.value = _table_html(table, self.max_rows)
+                self._table = table
+            self.resistance.value = resistance
+            self._draw_curves()
+        except Exception as err:
+            if not self._is_superseded(generation):
+                self.status.value = f'update failed: {type(err).__name__}: {err}'
+            return
+        self.status.value = f'solved in {i} iterations'
+
+    def close(self):
+        """Stop the background thread and close the widget."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._generation += 1
+        self._executor.shutdown(wait=False)
+        self.widget.close()
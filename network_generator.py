@@ -0,0 +1,223 @@
+"""Generate synthetic closed pipe networks in the CSV format used by the
+notebooks (see `networks/ex1_closed-pipe-network-design.csv`).
+
+The generated tables can be written to a CSV file with
+`table.to_csv(file_path, index=False)` and loaded into a `PipeNetwork` with
+`pipe_network.load_from_csv(file_path)`.
+"""
+from typing import List, Tuple, Optional
+import random
+import pandas as pd
+
+
+COLUMNS = [
+    'conduit_ID', 'start_node_ID', 'end_node_ID', 'loop_ID', 'schedule',
+    'length', 'volume_flow_rate', 'specific_pressure_drop'
+]
+
+# flow rates (in L/s) are rounded to this number of decimals; the flow rate of
+# a header pipe is the sum of the rounded terminal flow rates, so that the flow
+# rates balance exactly at every node
+FLOW_DECIMALS = 6
+
+
+def _loop_ID(loop_IDs: List[str]) -> str:
+    # A conduit that belongs to more than one loop is written as a tuple,
+    # e.g. "(L1, L2)".
+    if len(loop_IDs) == 1:
+        return loop_IDs[0]
+    return f"({', '.join(loop_IDs)})"
+
+
+def _row(conduit_ID, start_node_ID, end_node_ID, loop_IDs, schedule, length, flow, dp_spec):
+    return [
+        conduit_ID, start_node_ID, end_node_ID, _loop_ID(loop_IDs), schedule,
+        length, round(flow, FLOW_DECIMALS), dp_spec
+    ]
+
+
+def ladder_network(
+        n_cross_overs: int,
+        header_schedule: str = 'copper',
+        cross_over_schedule: str = 'pex',
+        header_length: Tuple[float, float] = (2.0, 4.0),
+        cross_over_length: Tuple[float, float] = (15.0, 25.0),
+        terminal_flow: Tuple[float, float] = (0.05, 0.2),
+        specific_pressure_drop: float = 0.2,
+        seed: Optional[int] = None
+) -> pd.DataFrame:
+    """Create a two-pipe ladder network with `n_cross_overs` cross-overs
+    between a supply header (nodes S0...Sn) and a return header (nodes R0...Rn),
+    laid out like the network in `ex1_closed-pipe-network-design.csv`. The
+    network has 3 * `n_cross_overs` conduits and `n_cross_overs` loops.
+
+    Params:
+    - n_cross_overs : int
+        Number of cross-overs (terminal units) in the network.
+    - header_schedule, cross_over_schedule : str
+        Names of the pipe schedules for the header pipes and the cross-overs.
+        The header schedule must contain sizes large enough for the total
+        network flow rate.
+    - header_length, cross_over_length : Tuple[float, float]
+        Range (in m) from which pipe lengths are drawn.
+    - terminal_flow : Tuple[float, float]
+        Range (in L/s) from which the design flow rate of each cross-over is
+        drawn.
+    - specific_pressure_drop : float
+        Design specific pressure drop (in kPa/m) of all pipes.
+    - seed : int, optional
+        Seed of the random generator, so that the same network is generated
+        each time.
+
+    Returns:
+        Pandas DataFrame with the columns of a network design CSV file.
+    """
+    if n_cross_overs < 1:
+        raise ValueError('a ladder network needs at least one cross-over')
+    rng = random.Random(seed)
+    n = n_cross_overs
+    q = [round(rng.uniform(*terminal_flow), FLOW_DECIMALS) for _ in range(n)]
+    # flow rate in header segment k is the sum of the cross-over flows downstream
+    q_header = [0.0] * n
+    acc = 0.0
+    for k in range(n - 1, -1, -1):
+        acc = round(acc + q[k], FLOW_DECIMALS)
+        q_header[k] = acc
+    supply, cross_overs, ret = [], [], []
+    for k in range(1, n + 1):
+        L_k = f'L{k}'
+        L_hdr = round(rng.uniform(*header_length), 1)
+        supply.append(_row(
+            f'P{k}', f'S{k - 1}', f'S{k}', [L_k], header_schedule,
+            L_hdr, q_header[k - 1], specific_pressure_drop
+        ))
+        ret.append(_row(
+            f'P{3 * n + 1 - k}', f'R{k}', f'R{k - 1}', [L_k], header_schedule,
+            L_hdr, q_header[k - 1], specific_pressure_drop
+        ))
+        cross_overs.append(_row(
+            f'P{n + k}', f'S{k}', f'R{k}', [L_k, f'L{k + 1}'] if k < n else [L_k],
+            cross_over_schedule, round(rng.uniform(*cross_over_length), 1),
+            q[k - 1], specific_pressure_drop
+        ))
+    return pd.DataFrame(supply + cross_overs + ret[::-1], columns=COLUMNS)
+
+
+def tree_network(
+        depth: int,
+        branching: int,
+        header_schedule: str = 'copper',
+        terminal_schedule: str = 'pex',
+        header_length: Tuple[float, float] = (2.0, 10.0),
+        terminal_length: Tuple[float, float] = (15.0, 25.0),
+        terminal_flow: Tuple[float, float] = (0.05, 0.2),
+        specific_pressure_drop: float = 0.2,
+        seed: Optional[int] = None
+) -> pd.DataFrame:
+    """Create a branched two-pipe network. The supply pipes form a tree of
+    `depth` levels below node S0 in which every node has `branching` children.
+    The return pipes mirror the supply tree and end in node R0. Each leaf of
+    the tree is connected to its return node through a terminal pipe.
+
+    The loops are chosen as follows: loop L1 runs from S0 to the first
+    terminal and back to R0 (and is closed by the pump); for each branch node,
+    a loop runs between every two consecutive child branches, each time through
+    the first terminal of these branches. This gives one loop per terminal.
+
+    Params:
+    - depth : int
+        Number of supply pipe levels below S0.
+    - branching : int
+        Number of child branches of each supply node.
+    - header_schedule, terminal_schedule : str
+        Names of the pipe schedules for the branch pipes and the terminals.
+    - header_length, terminal_length : Tuple[float, float]
+        Range (in m) from which pipe lengths are drawn.
+    - terminal_flow : Tuple[float, float]
+        Range (in L/s) from which the design flow rate of each terminal is
+        drawn.
+    - specific_pressure_drop : float
+        Design specific pressure drop (in kPa/m) of all pipes.
+    - seed : int, optional
+        Seed of the random generator.
+
+    Returns:
+        Pandas DataFrame with the columns of a network design CSV file.
+    """
+    if depth < 1 or branching < 1:
+        raise ValueError('depth and branching must be at least 1')
+    rng = random.Random(seed)
+    # nodes are numbered breadth-first; node 0 is the root (S0/R0)
+    children = {0: []}
+    parent = {}
+    level = [0]
+    next_node = 1
+    for _ in range(depth):
+        next_level = []
+        for v in level:
+            for _ in range(branching):
+                children[v].append(next_node)
+                children[next_node] = []
+                parent[next_node] = v
+                next_level.append(next_node)
+                next_node += 1
+        level = next_level
+    leaves = level
+    q = {v: round(rng.uniform(*terminal_flow), FLOW_DECIMALS) for v in leaves}
+    for v in range(next_node - 1, 0, -1):  # children are numbered after their parent
+        if children[v]:
+            q[v] = round(sum(q[c] for c in children[v]), FLOW_DECIMALS)
+    # loop membership of the supply/return pipe ending in node v, and of the
+    # terminal pipe in leaf v
+    pipe_loops = {v: [] for v in range(1, next_node)}
+    terminal_loops = {v: [] for v in leaves}
+
+    def add_path(v, loop_ID):
+        # path from v down to the first leaf of its sub-tree
+        while True:
+            pipe_loops[v].append(loop_ID)
+            if not children[v]:
+                terminal_loops[v].append(loop_ID)
+                return
+            v = children[v][0]
+
+    n_loops = 1
+    add_path(children[0][0], 'L1')
+    for v in range(next_node):
+        for c1, c2 in zip(children[v], children[v][1:]):
+            n_loops += 1
+            add_path(c1, f'L{n_loops}')
+            add_path(c2, f'L{n_loops}')
+    lengths = {v: round(rng.uniform(*header_length), 1) for v in range(1, next_node)}
+    supply, terminals, ret = [], [], []
+    k = 0
+    for v in range(1, next_node):
+        k += 1
+        supply.append(_row(
+            f'P{k}', f'S{parent[v]}', f'S{v}', pipe_loops[v], header_schedule,
+            lengths[v], q[v], specific_pressure_drop
+        ))
+    for v in leaves:
+        k += 1
+        terminals.append(_row(
+            f'P{k}', f'S{v}', f'R{v}', terminal_loops[v], terminal_schedule,
+            round(rng.uniform(*terminal_length), 1), q[v], specific_pressure_drop
+        ))
+    for v in range(next_node - 1, 0, -1):
+        k += 1
+        ret.append(_row(
+            f'P{k}', f'R{v}', f'R{parent[v]}', pipe_loops[v], header_schedule,
+            lengths[v], q[v], specific_pressure_drop
+        ))
+    return pd.DataFrame(supply + terminals + ret, columns=COLUMNS)
+
+
+def get_cross_over_IDs(table: pd.DataFrame) -> List[str]:
+    """Return the IDs of the conduits in a generated network that connect a
+    supply node with a return node (the cross-overs or terminals).
+    """
+    mask = (
+        table['start_node_ID'].str.startswith('S')
+        & table['end_node_ID'].str.startswith('R')
+    )
+    return table.loc[mask, 'conduit_ID'].tolist()
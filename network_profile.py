@@ -0,0 +1,156 @@
+"""Report where the memory of a (loaded) `PipeNetwork` goes and which functions
+dominate the time of `analyze`.
+
+Usage:
+    report = profile_report(pipe_network, tolerance=Q_(1, 'Pa'), i_max=500)
+    report['memory']     # memory by object type
+    report['conduits']   # memory by conduit
+    report['solver']     # most expensive functions during a sampled analysis
+
+The tables are Pandas DataFrames, so they can be saved (e.g. with `to_csv`)
+and compared between projects.
+"""
+import copy
+import cProfile
+import gc
+import pstats
+import sys
+import types
+from collections import defaultdict
+from typing import Dict, Optional, Set
+import pandas as pd
+
+# objects that are shared by all networks (classes, modules, functions, the
+# unit registry) are not counted as part of a network
+_skip_types = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType
+)
+
+
+def _is_shared(obj) -> bool:
+    return isinstance(obj, _skip_types) or 'Registry' in type(obj).__name__
+
+
+def _walk(obj, seen: Set[int], sizes: Dict[str, list]) -> int:
+    """Add the size of `obj` and of all objects it refers to, which are not in
+    `seen` yet, to `sizes` (count and bytes by type name) and return the total
+    size in bytes.
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or _is_shared(o):
+            continue
+        seen.add(id(o))
+        size = sys.getsizeof(o, 0)
+        total += size
+        entry = sizes.setdefault(f'{type(o).__module__}.{type(o).__qualname__}', [0, 0])
+        entry[0] += 1
+        entry[1] += size
+        stack.extend(gc.get_referents(o))
+    return total
+
+
+def memory_report(pipe_network) -> pd.DataFrame:
+    """Return the number of objects and their total size in bytes by object
+    type, for all objects that make up `pipe_network`.
+    """
+    sizes = {}
+    _walk(pipe_network, set(), sizes)
+    df = pd.DataFrame(
+        [(name, n, b) for name, (n, b) in sizes.items()],
+        columns=['type', 'count', 'bytes']
+    )
+    df = df.sort_values('bytes', ascending=False, ignore_index=True)
+    df['% bytes'] = 100 * df['bytes'] / df['bytes'].sum()
+    return df
+
+
+def _own_objects(conduit, excluded: Set[int]) -> Dict[int, tuple]:
+    # objects reachable from `conduit` without passing through an excluded
+    # object or a node or network object, by id, with their type and size
+    own = {}
+    stack = [conduit]
+    while stack:
+        o = stack.pop()
+        if id(o) in own or _is_shared(o):
+            continue
+        if o is not conduit and (id(o) in excluded or type(o).__name__.endswith(('Node', 'Network'))):
+            continue
+        own[id(o)] = (f'{type(o).__module__}.{type(o).__qualname__}', sys.getsizeof(o, 0))
+        stack.extend(gc.get_referents(o))
+    return own
+
+
+def conduit_memory_table(pipe_network) -> pd.DataFrame:
+    """Return the number of objects and the size in bytes of each conduit in
+    `pipe_network`, counting only the objects that belong to that conduit
+    alone. The walk from a conduit stops at other conduits, at nodes, at the
+    network and at the objects the network refers to directly (e.g. the
+    fluid). Objects that can be reached from more than one conduit are not
+    counted with any conduit, so the table doesn't depend on the order of the
+    conduits; these objects are included in `memory_report`.
+    """
+    conduits = pipe_network.conduits
+    excluded = {id(pipe_network), id(conduits)}
+    excluded.update(id(c) for c in conduits.values())
+    excluded.update(id(v) for v in getattr(pipe_network, '__dict__', {}).values())
+    own = {ID: _own_objects(conduit, excluded) for ID, conduit in conduits.items()}
+    reached = defaultdict(int)
+    for objects in own.values():
+        for i in objects:
+            reached[i] += 1
+    rows = []
+    for ID, objects in own.items():
+        sizes = [size for i, (_, size) in objects.items() if reached[i] == 1]
+        rows.append((ID, len(sizes), sum(sizes)))
+    return pd.DataFrame(rows, columns=['conduit_ID', 'objects', 'bytes'])
+
+
+def solver_profile(pipe_network, n_top: int = 20, **solver_settings) -> pd.DataFrame:
+    """Analyze a copy of `pipe_network` under the profiler and return the
+    `n_top` functions with the largest cumulative time. The column
+    'cumtime / n_conduits' divides the cumulative time by the number of
+    conduits (NaN for a network without conduits), which allows comparing
+    networks of different size. It is not the time spent on a particular
+    conduit: the profiler measures functions, so the time can't be attributed
+    to individual conduits.
+
+    Params:
+    - pipe_network : PipeNetwork
+        The network to be profiled; the network itself is not changed.
+    - n_top : int, default 20
+        The number of functions in the table.
+    - solver_settings :
+        Keyword arguments passed to `analyze`, e.g. `tolerance` and `i_max`.
+    """
+    network = copy.deepcopy(pipe_network)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        network.analyze(**solver_settings)
+    finally:
+        profiler.disable()
+    stats = pstats.Stats(profiler)
+    n_conduits = len(pipe_network.conduits)
+    rows = []
+    for (file, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append((
+            f'{func} ({file}:{line})', ncalls, tottime, cumtime,
+            cumtime / n_conduits if n_conduits else float('nan')
+        ))
+    df = pd.DataFrame(rows, columns=['function', 'ncalls', 'tottime', 'cumtime', 'cumtime / n_conduits'])
+    return df.sort_values('cumtime', ascending=False, ignore_index=True).head(n_top)
+
+
+def profile_report(pipe_network, n_top: int = 20, **solver_settings) -> Dict[str, Optional[pd.DataFrame]]:
+    """Return the memory report, the conduit memory table and, if solver
+    settings are given, the solver profile of `pipe_network`.
+    """
+    return {
+        'memory': memory_report(pipe_network),
+        'conduits': conduit_memory_table(pipe_network),
+        'solver': solver_profile(pipe_network, n_top, **solver_settings) if solver_settings else None
+    }
@@ -0,0 +1,264 @@
+"""Check a network CSV file (in the format of the files in `networks/`) before it
+is loaded with `PipeNetwork.load_from_csv` and analyzed.
+
+Mistakes in the CSV file, such as a flow imbalance at a node, a loop that
+doesn't close or conduits that are not connected to the rest of the network,
+otherwise only show up as a non-converging analysis. The checks below take a
+single pass over the conduits of the network.
+"""
+from typing import List, Optional, Dict, Union, Iterable
+from collections import defaultdict
+import pandas as pd
+
+
+def parse_loop_IDs(loop_ID) -> List[str]:
+    """Return the list of loop IDs in a cell of the `loop_ID` column, e.g.
+    "L1" or "(L1, L2)".
+    """
+    if not isinstance(loop_ID, str):
+        return []
+    return [ID.strip() for ID in loop_ID.strip().strip('()').split(',') if ID.strip()]
+
+
+def _read(table: Union[str, pd.DataFrame]) -> pd.DataFrame:
+    if isinstance(table, str):
+        return pd.read_csv(table)
+    return table
+
+
+def check_network(
+        table: Union[str, pd.DataFrame],
+        start_node_ID: Optional[str] = None,
+        end_node_ID: Optional[str] = None,
+        tolerance: float = 1e-3
+) -> List[str]:
+    """Check the connectivity, the flow balance at the nodes and the closure of
+    the loops of a network and return a list with the problems found (an empty
+    list if the network is valid).
+
+    Params:
+    - table : str | DataFrame
+        The path of the network CSV file or the table read from it.
+    - start_node_ID, end_node_ID : str, optional
+        The nodes where the flow enters and leaves the network, as passed to
+        `PipeNetwork.create`. If the network is closed by a (pseudo) conduit
+        for the pump, these can be omitted.
+    - tolerance : float
+        The allowed flow imbalance at a node (in the unit of the
+        `volume_flow_rate` column).
+    """
+    table = _read(table)
+    problems = []
+    # external nodes: flow may enter or leave the network here
+    external = {ID for ID in (start_node_ID, end_node_ID) if ID is not None}
+    has_flow = 'volume_flow_rate' in table.columns
+    has_loops = 'loop_ID' in table.columns
+    adjacency = defaultdict(list)
+    balance = defaultdict(float)
+    loops = defaultdict(list)
+    for row in table.itertuples(index=False):
+        c, s, e = row.conduit_ID, row.start_node_ID, row.end_node_ID
+        adjacency[s].append(e)
+        adjacency[e].append(s)
+        if has_flow:
+            q = row.volume_flow_rate
+            if pd.isna(q):
+                # the flow through this conduit (e.g. a pump) is unknown, so
+                # the balance at its nodes can't be checked
+                external.update((s, e))
+            else:
+                balance[s] -= q
+                balance[e] += q
+        if has_loops:
+            for loop_ID in parse_loop_IDs(row.loop_ID):
+                loops[loop_ID].append((c, s, e))
+
+    # connectivity: all nodes should be reachable from the first node
+    nodes = list(adjacency)
+    if nodes:
+        root = start_node_ID if start_node_ID in adjacency else nodes[0]
+        reached = {root}
+        stack = [root]
+        while stack:
+            for n in adjacency[stack.pop()]:
+                if n not in reached:
+                    reached.add(n)
+                    stack.append(n)
+        if len(reached) < len(nodes):
+            mask = ~table['start_node_ID'].isin(reached)
+            problems.append(
+                f"conduits not connected to node {root}: "
+                f"{', '.join(table.loc[mask, 'conduit_ID'].astype(str))}"
+            )
+    for ID in (start_node_ID, end_node_ID):
+        if ID is not None and ID not in adjacency:
+            problems.append(f"node {ID} is not connected to any conduit")
+
+    # flow balance at the internal nodes, and the flow rate entering at the
+    # start node should leave at the end node
+    if has_flow:
+        for node, residual in balance.items():
+            if node not in external and abs(residual) > tolerance:
+                problems.append(f"flow imbalance at node {node}: {residual:+.6g}")
+        if (
+            start_node_ID in balance and end_node_ID in balance
+            and abs(balance[start_node_ID] + balance[end_node_ID]) > tolerance
+        ):
+            problems.append(
+                f"flow rate leaving at node {end_node_ID} ({balance[end_node_ID]:.6g}) "
+                f"differs from flow rate entering at node {start_node_ID} "
+                f"({-balance[start_node_ID]:.6g})"
+            )
+
+    # loop closure: the conduits of a loop must form a single cycle, i.e. every
+    # node of the loop is shared by exactly two of its conduits and all the
+    # conduits can be visited by walking along the loop. A loop may be closed
+    # through the pump between the end and the start node.
+    for loop_ID, conduits in loops.items():
+        problem = _check_loop(conduits, start_node_ID, end_node_ID)
+        if problem:
+            problems.append(f"loop {loop_ID} {problem}")
+    return problems
+
+
+def _check_loop(conduits: list, start_node_ID, end_node_ID) -> Optional[str]:
+    incident: Dict[str, list] = defaultdict(list)
+    for i, (_, s, e) in enumerate(conduits):
+        incident[s].append(i)
+        incident[e].append(i)
+    open_nodes = sorted(n for n, edges in incident.items() if len(edges) != 2)
+    if open_nodes:
+        if (
+            len(open_nodes) == 2 and set(open_nodes) == {start_node_ID, end_node_ID}
+            and len(incident[start_node_ID]) == len(incident[end_node_ID]) == 1
+        ):
+            # closed through the pump: add it as a virtual conduit
+            incident[end_node_ID].append(len(conduits))
+            incident[start_node_ID].append(len(conduits))
+            conduits = conduits + [('pump', end_node_ID, start_node_ID)]
+        else:
+            return f"is not closed at node(s) {', '.join(open_nodes)}"
+    # walk along the loop starting from the first conduit
+    visited = {0}
+    node = conduits[0][2]
+    i = 0
+    while True:
+        j = incident[node][0] if incident[node][0] != i else incident[node][1]
+        if j in visited:
+            break
+        visited.add(j)
+        _, s, e = conduits[j]
+        node = e if node == s else s
+        i = j
+    if len(visited) < len(conduits):
+        return "consists of more than one closed circuit"
+    return None
+
+
+def validate_network(
+        table: Union[str, pd.DataFrame],
+        start_node_ID: Optional[str] = None,
+        end_node_ID: Optional[str] = None,
+        tolerance: float = 1e-3
+) -> None:
+    """Check the network like `check_network` and raise a `ValueError` listing
+    all problems found, if any.
+    """
+    problems = check_network(table, start_node_ID, end_node_ID, tolerance)
+    if problems:
+        raise ValueError("invalid network:\n- " + "\n- ".join(problems))
+
+
+def balance_flows(
+        table: Union[str, pd.DataFrame],
+        start_node_ID: Optional[str] = None,
+        end_node_ID: Optional[str] = None,
+        fixed_conduit_IDs: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Return a copy of the network table in which the initial flow rates are
+    corrected so that inflow equals outflow at every internal node. The
+    correction is the smallest one in the least-squares sense.
+
+    Note that the flow rates of the conduits connected to the start and end
+    node can also be corrected, so the total flow rate through the network may
+    change. Without `fixed_conduit_IDs`, the correction is spread over all
+    conduits, including the terminals, whose flow rates are usually the design
+    data: to correct a mistake in a header pipe, keep the terminal flow rates
+    fixed (e.g. with `network_generator.get_cross_over_IDs(table)`).
+
+    Params:
+    - table, start_node_ID, end_node_ID : see `check_network`. If the table
+        has no conduit without flow rate (the pump), the start and end node
+        must be given.
+    - fixed_conduit_IDs : Iterable[str], optional
+        The conduits whose flow rate must not be changed.
+
+    Raises:
+        ValueError if the start or end node is missing, or if the flow rates
+        can't be balanced without changing the flow rates of the fixed
+        conduits.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    from scipy.sparse.linalg import spsolve
+
+    table = _read(table).copy()
+    q = table['volume_flow_rate'].to_numpy(dtype=float, copy=True)
+    known = ~np.isnan(q)
+    if known.all() and (start_node_ID is None or end_node_ID is None):
+        raise ValueError(
+            "the network has no pump conduit (a conduit without flow rate): "
+            "start_node_ID and end_node_ID must be given"
+        )
+    fixed = table['conduit_ID'].isin(set(fixed_conduit_IDs if fixed_conduit_IDs is not None else ())).to_numpy()
+    external = {ID for ID in (start_node_ID, end_node_ID) if ID is not None}
+    external.update(table.loc[~known, 'start_node_ID'])
+    external.update(table.loc[~known, 'end_node_ID'])
+    starts = table['start_node_ID'].to_numpy()[known]
+    ends = table['end_node_ID'].to_numpy()[known]
+    internal = sorted(set(starts).union(ends).difference(external))
+    index = {node: k for k, node in enumerate(internal)}
+    rows, cols, vals = [], [], []
+    for j, (s, e) in enumerate(zip(starts, ends)):
+        if s in index:
+            rows.append(index[s]); cols.append(j); vals.append(-1.0)
+        if e in index:
+            rows.append(index[e]); cols.append(j); vals.append(1.0)
+    A = csr_matrix((vals, (rows, cols)), shape=(len(internal), len(starts)))
+    residual = A @ q[known]
+    # only the flow rates of the conduits that are not fixed are corrected
+    free = ~fixed[known]
+    A_free = A[:, np.flatnonzero(free)]
+    # The correction is dq = A_free.T @ y with (A_free @ A_free.T) @ y =
+    # -residual. This matrix is singular for a group of internal nodes that is
+    # not connected to an external node through free conduits; in each such
+    # group the balance at one node follows from the others (if the group can
+    # be balanced at all), so this node is left out.
+    n = len(internal)
+    free_starts = [index.get(s, n) for s in starts[free]]
+    free_ends = [index.get(e, n) for e in ends[free]]
+    graph = csr_matrix((np.ones(len(free_starts)), (free_starts, free_ends)), shape=(n + 1, n + 1))
+    _, labels = connected_components(graph, directed=False)
+    _, first = np.unique(labels, return_index=True)
+    keep = np.ones(n, dtype=bool)
+    keep[first[first < n]] = False
+    keep[labels[:n] == labels[n]] = True
+    A_keep = A_free[np.flatnonzero(keep)]
+    if A_keep.shape[0]:
+        y = spsolve((A_keep @ A_keep.T).tocsc(), -residual[keep])
+        dq = A_keep.T @ np.atleast_1d(y)
+    else:
+        dq = np.zeros(A_free.shape[1])
+    remaining = residual + A_free @ dq
+    if remaining.size and np.abs(remaining).max() > 1e-9 * max(1.0, np.abs(q[known]).max()):
+        k = int(np.abs(remaining).argmax())
+        raise ValueError(
+            f"flow rates can't be balanced without changing the fixed conduits "
+            f"(remaining imbalance at node {internal[k]}: {remaining[k]:+.6g})"
+        )
+    q_known = q[known]
+    q_known[free] += dq
+    q[known] = q_known
+    table['volume_flow_rate'] = q
+    return table
@@ -0,0 +1,116 @@
+"""Export the results of an analyzed `PipeNetwork` as typed columns, so that
+the results of many scenarios can be compared without running the analysis
+again.
+
+Usage:
+    export_results(pipe_network, './_results', scenario='valves_50pct')
+    export_results(other_network, './_results', scenario='valves_100pct')
+
+    # e.g. with DuckDB or pandas
+    duckdb.sql("SELECT * FROM read_parquet('_results/*.parquet')")
+    pd.read_parquet('./_results')
+
+Each scenario is written to its own file `<scenario>.parquet` (or `.arrow`) in
+the result directory, so scenarios can be added one at a time; exporting a
+scenario again replaces its file. Every file has a `scenario` column with the
+scenario key and a row per conduit. The quantities are stored as floats in SI
+units; the unit of each column is stored in the metadata of its field (key
+`unit`) and a quantity that a conduit doesn't have (e.g. the velocity of a
+pseudo conduit) is NaN.
+
+The tables returned by `get_pipe_table()` and the other table methods of
+`PipeNetwork` are formatted for display; the values here are read directly
+from the public attributes of the conduits.
+"""
+import math
+import os
+import re
+from typing import Dict
+
+import pandas as pd
+
+# conduit attributes that are exported and their SI unit
+RESULT_QUANTITIES: Dict[str, str] = {
+    'volume_flow_rate': 'm ** 3 / s',
+    'velocity': 'm / s',
+    'pressure_drop': 'Pa',
+    'hydraulic_resistance': 'Pa / (m ** 3 / s) ** 2',
+    'length': 'm',
+}
+
+_scenario_pattern = re.compile(r'[\w\-.]+')
+
+
+def _magnitude(value, unit: str) -> float:
+    if value is None:
+        return math.nan
+    try:
+        return float(value.to(unit).magnitude)
+    except AttributeError:
+        return math.nan
+
+
+def _node_ID(conduit, name: str):
+    node = getattr(conduit, name, None)
+    return getattr(node, 'ID', None)
+
+
+def get_result_table(pipe_network, scenario: str) -> pd.DataFrame:
+    """Return a table with a row for each conduit of `pipe_network` and a
+    column in SI units for each quantity in `RESULT_QUANTITIES`.
+    """
+    rows = []
+    for ID, conduit in pipe_network.conduits.items():
+        row = {
+            'scenario': scenario,
+            'conduit_ID': str(ID),
+            'start_node_ID': _node_ID(conduit, 'start_node'),
+            'end_node_ID': _node_ID(conduit, 'end_node')
+        }
+        for name, unit in RESULT_QUANTITIES.items():
+            row[name] = _magnitude(getattr(conduit, name, None), unit)
+        rows.append(row)
+    columns = ['scenario', 'conduit_ID', 'start_node_ID', 'end_node_ID', *RESULT_QUANTITIES]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def export_results(pipe_network, path: str, scenario: str, format: str = 'parquet') -> str:
+    """Write the results of the analyzed `pipe_network` for `scenario` to the
+    result directory `path` and return the path of the written file.
+
+    Params:
+    - pipe_network : PipeNetwork
+        The analyzed network.
+    - path : str
+        The result directory; it is created if it doesn't exist.
+    - scenario : str
+        The scenario key, which is also the file name, so it may only contain
+        letters, digits, '_', '-' and '.'.
+    - format : {'parquet', 'arrow'}, default 'parquet'
+        Write a Parquet file or an Arrow IPC file.
+
+    Raises:
+        ValueError if the scenario key or the format is not valid.
+    """
+    if not _scenario_pattern.fullmatch(scenario):
+        raise ValueError(f"invalid scenario key {scenario!r}")
+    if format not in ('parquet', 'arrow'):
+        raise ValueError(f"format must be 'parquet' or 'arrow', not {format!r}")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [pa.field(name, pa.string()) for name in ('scenario', 'conduit_ID', 'start_node_ID', 'end_node_ID')]
+        + [pa.field(name, pa.float64(), metadata={'unit': unit}) for name, unit in RESULT_QUANTITIES.items()]
+    )
+    table = pa.Table.from_pandas(get_result_table(pipe_network, scenario), schema=schema, preserve_index=False)
+    os.makedirs(path, exist_ok=True)
+    file_path = os.path.join(path, f'{scenario}.{format}')
+    tmp_path = file_path + '.tmp'
+    if format == 'parquet':
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, file_path)
+    return file_path
@@ -0,0 +1,290 @@
+"""Cache the solutions of `PipeNetwork.analyze` on disk, so that a network that
+hasn't changed since a previous run doesn't need to be analyzed again.
+
+Usage:
+    cache = SolutionCache('./_cache/networks', max_size=500 * 2 ** 20)
+    pipe_network, i = cache.analyze(pipe_network, tolerance=Q_(1, 'Pa'), i_max=500)
+    cache.stats()
+
+The cache key is a hash of a canonical description of the network, which
+covers the topology, the conduits and their fittings, the fluid state and the
+valve settings, together with the solver settings and the source of the `hvac`
+package (so that solutions of an older version of the solver are not reused).
+The description walks all attributes of the network in a fixed order (dict
+keys and set elements are sorted by the hash of their own description, shared
+objects are referred to by the order in which they were first met), so the key
+doesn't depend on the process, unlike the bytes of a pickle. Objects that keep
+their state outside Python attributes (e.g. extension types) are only described
+by their type.
+
+Note that the network also holds the current flow rates, which are the starting
+values of the analysis: a network loaded from the same file gets the same key,
+but a network that was analyzed before with other valve settings does not.
+"""
+import copy
+import hashlib
+import json
+import os
+import pickle
+import re
+import types
+from typing import Tuple, Any, Optional
+
+from deps import get_hvac_fingerprint
+
+_shared_types = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType
+)
+_primitive_types = (type(None), bool, int, float, complex, str, bytes)
+_address = re.compile(r' at 0x[0-9a-fA-F]+')
+# maximum levels of nested objects described by the sort key of dict keys and
+# set elements
+_SORT_DEPTH = 16
+
+
+def _attributes(obj) -> dict:
+    attrs = dict(getattr(obj, '__dict__', {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                attrs[name] = getattr(obj, name)
+    return attrs
+
+
+def _items(o, name: str) -> list:
+    # the parts of the description of a (not shared, not primitive) object:
+    # tokens and child objects; dict items and set elements are returned in
+    # the order of the container and need to be sorted by the caller
+    if 'Registry' in name:
+        return [('tok', 'registry')]
+    if hasattr(o, 'magnitude') and hasattr(o, 'units') and 'Quantity' in name:
+        # pint Quantity: magnitude and units
+        return [('tok', 'Q'), ('obj', o.magnitude), ('tok', str(o.units))]
+    if hasattr(o, 'dtype') and hasattr(o, 'tobytes'):
+        # NumPy array or scalar
+        return [('tok', f'nd:{o.dtype.str}:{getattr(o, "shape", ())}'), ('tok', o.tobytes().hex())]
+    if isinstance(o, (list, tuple)):
+        return [('tok', f'{name}:{len(o)}')] + [('obj', x) for x in o]
+    attrs = _attributes(o)
+    items = [('tok', f'{type(o).__module__}.{type(o).__qualname__}:{len(attrs)}')]
+    for k in sorted(attrs):
+        items += [('tok', k), ('obj', attrs[k])]
+    if not attrs:
+        items.append(('tok', _address.sub('', repr(o))))
+    return items
+
+
+def _leaf(o) -> Optional[str]:
+    # the description of a primitive or shared object, None for other objects
+    if isinstance(o, _primitive_types):
+        return f'{type(o).__name__}:{o!r}'
+    if isinstance(o, _shared_types):
+        return f'{getattr(o, "__module__", "")}.{getattr(o, "__qualname__", "")}'
+    return None
+
+
+def _sub_hash(o, depth: int, cache: dict) -> str:
+    """Return a hash of the description of `o` cut off at `depth` levels of
+    nested objects, below which objects are described by their type only.
+    Unlike the description in `canonical_hash`, it doesn't refer back to
+    objects that were met before, so it only depends on `o` itself; it is
+    used to sort dict keys and set elements.
+    """
+    leaf = _leaf(o)
+    if leaf is not None:
+        return leaf
+    if depth == 0:
+        return f'{type(o).__module__}.{type(o).__qualname__}'
+    key = (id(o), depth)
+    if key not in cache:
+        if isinstance(o, dict):
+            parts = sorted(
+                _sub_hash(k, depth - 1, cache) + ':' + _sub_hash(v, depth - 1, cache)
+                for k, v in o.items()
+            )
+            parts.insert(0, f'dict:{len(o)}')
+        elif isinstance(o, (set, frozenset)):
+            parts = sorted(_sub_hash(x, depth - 1, cache) for x in o)
+            parts.insert(0, f'set:{len(o)}')
+        else:
+            parts = [
+                x if kind == 'tok' else _sub_hash(x, depth - 1, cache)
+                for kind, x in _items(o, type(o).__name__)
+            ]
+        # the object is kept with its hash, so that its id can't be reused
+        cache[key] = (o, hashlib.sha256('\0'.join(parts).encode()).hexdigest())
+    return cache[key][1]
+
+
+def _sorted(elements, cache: dict) -> list:
+    # sort by `_sub_hash`, starting with the direct attributes of the elements
+    # and describing more levels while elements have the same sort key
+    elements = list(elements)
+    depth = 1
+    while True:
+        keys = [_sub_hash(x, depth, cache) for x in elements]
+        if len(set(keys)) == len(keys) or depth >= _SORT_DEPTH:
+            return [x for _, x in sorted(zip(keys, elements), key=lambda pair: pair[0])]
+        depth *= 2
+
+
+def canonical_hash(*objs) -> str:
+    """Return a hash of the canonical description of `objs` that is the same
+    in every process.
+
+    Dict keys and set elements are sorted with `_sub_hash`. Elements whose
+    descriptions are the same up to `_SORT_DEPTH` levels keep the order of
+    the container.
+    """
+    h = hashlib.sha256()
+    memo = {}
+    sub_hashes = {}
+    stack = [('obj', obj) for obj in reversed(objs)]
+    # work items are either an object to be described or a token to be hashed;
+    # the stack is used instead of recursion, because the object graph of a
+    # large network is deep
+    while stack:
+        kind, o = stack.pop()
+        if kind == 'tok':
+            h.update(o.encode())
+            h.update(b'\0')
+            continue
+        leaf = _leaf(o)
+        if leaf is not None:
+            h.update(leaf.encode())
+            h.update(b'\0')
+            continue
+        if id(o) in memo:
+            h.update(f'ref:{memo[id(o)][0]}'.encode())
+            h.update(b'\0')
+            continue
+        # the object is kept in the memo, so that its id can't be reused
+        memo[id(o)] = (len(memo), o)
+        if isinstance(o, dict):
+            items = [('tok', f'dict:{len(o)}')]
+            for k in _sorted(o, sub_hashes):
+                items += [('obj', k), ('obj', o[k])]
+        elif isinstance(o, (set, frozenset)):
+            items = [('tok', f'set:{len(o)}')] + [('obj', x) for x in _sorted(o, sub_hashes)]
+        else:
+            items = _items(o, type(o).__name__)
+        stack.extend(reversed(items))
+    return h.hexdigest()
+
+
+class SolutionCache:
+    """Size-bounded cache of analyzed networks with least-recently-used
+    eviction.
+
+    Params:
+    - cache_dir : str
+        Directory where the analyzed networks are stored.
+    - max_size : int, default 500 MiB
+        Maximum total size in bytes of the stored networks. When it is
+        exceeded, the least recently used networks are removed.
+    """
+    _stats_file = 'stats.json'
+
+    def __init__(self, cache_dir: str, max_size: int = 500 * 2 ** 20):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+        self._hvac_fingerprint = get_hvac_fingerprint()
+        self._stats = {'hits': 0, 'misses': 0}
+        try:
+            with open(os.path.join(cache_dir, self._stats_file)) as f:
+                self._stats.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    def key(self, pipe_network, **solver_settings) -> str:
+        """Return the cache key of `pipe_network` analyzed with the given
+        keyword arguments of `analyze`.
+        """
+        return canonical_hash(self._hvac_fingerprint, pipe_network, solver_settings)
+
+    @staticmethod
+    def _load(path: str):
+        # return the stored (network, iterations), or None if there is no
+        # entry or if it can't be loaded anymore (e.g. after classes in hvac
+        # have been renamed), in which case the entry is removed
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            os.remove(path)
+            return None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.pickle')
+
+    def analyze(self, pipe_network, **solver_settings) -> Tuple[Any, int]:
+        """Return the analyzed network and the number of iterations of the
+        analysis. `pipe_network` itself is not changed: on a cache hit, the
+        stored network is returned; on a miss, a copy of `pipe_network` is
+        analyzed with `analyze(**solver_settings)` and stored. In both cases
+        the returned network is a different object than `pipe_network`.
+        """
+        key = self.key(pipe_network, **solver_settings)
+        path = self._path(key)
+        entry = self._load(path)
+        if entry is None:
+            self._stats['misses'] += 1
+            solved_network = copy.deepcopy(pipe_network)
+            i = solved_network.analyze(**solver_settings)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((solved_network, i), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict()
+        else:
+            solved_network, i = entry
+            self._stats['hits'] += 1
+            os.utime(path)  # mark as recently used
+        self._save_stats()
+        return solved_network, i
+
+    def _entries(self) -> list:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.pickle'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        size = sum(e[1] for e in entries)
+        # the most recent entry is always kept
+        for _, entry_size, path in entries[:-1]:
+            if size <= self.max_size:
+                break
+            os.remove(path)
+            size -= entry_size
+
+    def _save_stats(self) -> None:
+        with open(os.path.join(self.cache_dir, self._stats_file), 'w') as f:
+            json.dump(self._stats, f)
+
+    def stats(self) -> dict:
+        """Return the number of hits and misses (accumulated over all runs
+        using this cache directory) and the number and total size of the
+        stored networks.
+        """
+        entries = self._entries()
+        return {
+            **self._stats,
+            'entries': len(entries),
+            'size': sum(e[1] for e in entries)
+        }
+
+    def clear(self) -> None:
+        """Remove all stored networks and reset the statistics."""
+        for _, _, path in self._entries():
+            os.remove(path)
+        self._stats = {'hits': 0, 'misses': 0}
+        self._save_stats()
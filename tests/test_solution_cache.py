@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+from solution_cache import SolutionCache, canonical_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_script = """
+import sys
+sys.path.insert(0, {root!r})
+from solution_cache import canonical_hash
+
+class Node:
+    def __init__(self, ID):
+        self.ID = ID
+        self.neighbors = set()
+
+class Wrapper:
+    def __init__(self, node):
+        self.node = node
+
+# the nodes and wrappers are created in a different order (so at other addresses) in each
+# process
+junk = [object() for _ in range({n_junk})]
+nodes = {{ID: Node(ID) for ID in {order!r}}}
+a, b, c = nodes['A'], nodes['B'], nodes['C']
+a.neighbors.update((b, c))
+b.neighbors.add(a)
+network = {{'nodes': {{a, b, c}}, 'by_node': {{c: 3, a: 1, b: 2}}, 'names': {{'x', 'y', 'z', 'w'}},
+           'wrapped': {{Wrapper(nodes[ID]) for ID in {order!r}}}}}
+print(canonical_hash(network))
+"""
+
+
+def _hash_in_process(n_junk: int, order: str, hash_seed: str) -> str:
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed)
+    out = subprocess.run(
+        [sys.executable, '-c', _script.format(root=ROOT, n_junk=n_junk, order=order)],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return out.strip()
+
+
+def test_canonical_hash_is_the_same_across_processes():
+    assert _hash_in_process(0, 'ABC', '1') == _hash_in_process(10000, 'CBA', '2')
+
+
+def test_canonical_hash_depends_on_set_contents():
+    assert canonical_hash({'x', 'y'}) != canonical_hash({'x', 'z'})
+
+
+class _Network:
+    def __init__(self):
+        self.flow = 0.0
+
+    def analyze(self, **solver_settings):
+        self.flow = 1.0
+        return 3
+
+
+def test_analyze_does_not_change_the_network(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    for _ in range(2):  # miss, then hit
+        network = _Network()
+        solved_network, i = cache.analyze(network, i_max=10)
+        assert (network.flow, solved_network.flow, i) == (0.0, 1.0, 3)
+        assert solved_network is not network
+    assert cache.stats()['hits'] == 1